@@ -4,11 +4,10 @@ Generate synthetic properties and events data with intentional dirty rows.
 Outputs to sample_data/ directory.
 """
 
+import numpy as np
 import pandas as pd
-import random
-from datetime import datetime, timedelta
 
-random.seed(42)
+rng = np.random.default_rng(42)
 
 # Configuration
 NUM_PROPERTIES = 200
@@ -30,181 +29,152 @@ LAG_BY_SOURCE = {
 COUNTIES = ["Los Angeles", "Orange", "San Diego", "Riverside", "San Bernardino"]
 STREETS = ["Main St", "Oak Ave", "Elm Dr", "Maple Ct", "Pine Rd", "Cedar Ln", "Birch Way"]
 
+# Dirty value pools
+DIRTY_STATUSES = ["ACTIVE", "active  ", "Unknown", "Pending", ""]
+DIRTY_VALUES = [-50000, 0, -1, None, ""]
+DIRTY_EVENT_TYPES = ["POSTPONED", "postponed  ", "Unknown", "Rescheduled", ""]
+DIRTY_SOURCES = ["ATTORNEY_UPDATE", "unknown_source", "manual", ""]
+DIRTY_EVENT_DATES = [None, "", "invalid-date", "2024-13-45"]
+DIRTY_UPDATED_AT = [None, "", "invalid"]
+NOTES = [
+    "Regular update",
+    "Court filing received",
+    "Trustee notification",
+    "Status change confirmed",
+    ""
+]
+
+
+def pick(values, n):
+    """Draw n values uniformly from a list"""
+    return np.array(values, dtype=object)[rng.integers(0, len(values), n)]
+
+
+def digits(low, high, n):
+    """Draw n integers in [low, high] as strings"""
+    return rng.integers(low, high + 1, n).astype(str).astype(object)
+
+
+def timestamps_ago(max_days, n):
+    """Timestamps between now and max_days ago"""
+    days = pd.to_timedelta(rng.integers(0, max_days + 1, n), unit="D")
+    return pd.Timestamp.now() - days
+
+
+def generate_apns(n):
+    """Generate n valid APNs in format XXX-XXX-XX"""
+    return digits(100, 999, n) + "-" + digits(100, 999, n) + "-" + digits(10, 99, n)
+
+
+def generate_malformed_apns(n):
+    """Generate n invalid APN formats"""
+    patterns = np.stack([
+        digits(10, 99, n) + "-" + digits(100, 999, n) + "-" + digits(10, 99, n),  # too short
+        digits(100, 999, n) + digits(100, 999, n) + digits(10, 99, n),  # no dashes
+        digits(100, 999, n) + "-" + digits(10, 99, n),  # incomplete
+        np.full(n, "INVALID", dtype=object),
+        np.full(n, "", dtype=object),
+    ])
+    return patterns[rng.integers(0, len(patterns), n), np.arange(n)]
+
+
+def generate_clean_properties(apns):
+    """Generate clean property columns for the given APNs"""
+    n = len(apns)
+    county = pick(COUNTIES, n)
+    return {
+        "apn": apns,
+        "county": county,
+        "status": pick(STATUSES, n),
+        "estimated_value": rng.integers(200000, 2000001, n).astype(object),
+        "address": digits(100, 9999, n) + " " + pick(STREETS, n) + ", " + county,
+        "last_updated": timestamps_ago(365, n).strftime("%Y-%m-%d %H:%M:%S").to_numpy(dtype=object)
+    }
 
-def generate_apn():
-    """Generate valid APN in format XXX-XXX-XX"""
-    return f"{random.randint(100, 999)}-{random.randint(100, 999)}-{random.randint(10, 99)}"
 
+def generate_properties():
+    """Generate properties dataset with dirty rows"""
+    is_dirty = rng.random(NUM_PROPERTIES) < DIRTY_RATIO
 
-def generate_malformed_apn():
-    """Generate invalid APN formats"""
-    patterns = [
-        f"{random.randint(10, 99)}-{random.randint(100, 999)}-{random.randint(10, 99)}",  # too short
-        f"{random.randint(100, 999)}{random.randint(100, 999)}{random.randint(10, 99)}",  # no dashes
-        f"{random.randint(100, 999)}-{random.randint(10, 99)}",  # incomplete
-        "INVALID",
-        ""
-    ]
-    return random.choice(patterns)
+    # Invalid APN on some dirty rows
+    bad_apn = is_dirty & (rng.random(NUM_PROPERTIES) < 0.3)
+    apns = np.where(bad_apn, generate_malformed_apns(NUM_PROPERTIES), generate_apns(NUM_PROPERTIES))
+    valid_apns = apns[~bad_apn].tolist()
 
+    properties = generate_clean_properties(apns)
 
-def generate_properties():
-    """Generate properties dataset with dirty rows"""
-    properties = []
-    valid_apns = []
-
-    # Generate mostly clean properties
-    for i in range(NUM_PROPERTIES):
-        is_dirty = random.random() < DIRTY_RATIO
-
-        if is_dirty and random.random() < 0.3:
-            # Invalid APN
-            apn = generate_malformed_apn()
-        else:
-            apn = generate_apn()
-            valid_apns.append(apn)
-
-        # County
-        county = random.choice(COUNTIES)
-
-        # Status - sometimes invalid
-        if is_dirty and random.random() < 0.2:
-            status = random.choice(["ACTIVE", "active  ", "Unknown", "Pending", ""])
-        else:
-            status = random.choice(STATUSES)
-
-        # Estimated value - sometimes negative or missing
-        if is_dirty and random.random() < 0.3:
-            estimated_value = random.choice([-50000, 0, -1, None, ""])
-        else:
-            estimated_value = random.randint(200000, 2000000)
-
-        # Address
-        address = f"{random.randint(100, 9999)} {random.choice(STREETS)}, {county}"
-
-        # Last updated
-        last_updated = datetime.now() - timedelta(days=random.randint(0, 365))
-
-        properties.append({
-            "apn": apn,
-            "county": county,
-            "status": status,
-            "estimated_value": estimated_value,
-            "address": address,
-            "last_updated": last_updated.strftime("%Y-%m-%d %H:%M:%S")
-        })
+    # Status - sometimes invalid
+    bad_status = is_dirty & (rng.random(NUM_PROPERTIES) < 0.2)
+    properties["status"] = np.where(bad_status, pick(DIRTY_STATUSES, NUM_PROPERTIES), properties["status"])
+
+    # Estimated value - sometimes negative or missing
+    bad_value = is_dirty & (rng.random(NUM_PROPERTIES) < 0.3)
+    properties["estimated_value"] = np.where(bad_value, pick(DIRTY_VALUES, NUM_PROPERTIES), properties["estimated_value"])
+
+    properties_df = pd.DataFrame(properties)
 
     # Inject duplicates (same apn, different last_updated)
     num_dupes = int(NUM_PROPERTIES * 0.1)
-    for _ in range(num_dupes):
-        if valid_apns:
-            apn = random.choice(valid_apns)
-            county = random.choice(COUNTIES)
-            status = random.choice(STATUSES)
-            estimated_value = random.randint(200000, 2000000)
-            address = f"{random.randint(100, 9999)} {random.choice(STREETS)}, {county}"
-            last_updated = datetime.now() - timedelta(days=random.randint(0, 365))
-
-            properties.append({
-                "apn": apn,
-                "county": county,
-                "status": status,
-                "estimated_value": estimated_value,
-                "address": address,
-                "last_updated": last_updated.strftime("%Y-%m-%d %H:%M:%S")
-            })
-
-    return pd.DataFrame(properties), valid_apns
+    if valid_apns and num_dupes:
+        dupes_df = pd.DataFrame(generate_clean_properties(pick(valid_apns, num_dupes)))
+        properties_df = pd.concat([properties_df, dupes_df], ignore_index=True)
+
+    return properties_df, valid_apns
 
 
 def generate_events(valid_apns):
     """Generate events dataset with dirty rows and FK violations"""
-    events = []
-
-    # Generate events
-    for i in range(NUM_EVENTS):
-        is_dirty = random.random() < DIRTY_RATIO
-
-        # APN - sometimes invalid or orphaned
-        if is_dirty and random.random() < 0.2 and valid_apns:
-            # Orphaned APN (not in properties)
-            apn = generate_apn()
-        elif is_dirty and random.random() < 0.1:
-            # Malformed APN
-            apn = generate_malformed_apn()
-        elif valid_apns:
-            apn = random.choice(valid_apns)
-        else:
-            apn = generate_apn()
-
-        # Event type - sometimes invalid
-        if is_dirty and random.random() < 0.2:
-            event_type = random.choice(["POSTPONED", "postponed  ", "Unknown", "Rescheduled", ""])
-        else:
-            event_type = random.choice(EVENT_TYPES)
-
-        # Source - sometimes invalid
-        if is_dirty and random.random() < 0.2:
-            source = random.choice(["ATTORNEY_UPDATE", "unknown_source", "manual", ""])
-        else:
-            source = random.choice(SOURCES)
-
-        # Event date - sometimes missing or invalid
-        if is_dirty and random.random() < 0.15:
-            event_date = random.choice([None, "", "invalid-date", "2024-13-45"])
-        else:
-            event_date = datetime.now() - timedelta(days=random.randint(0, 180))
-            event_date = event_date.strftime("%Y-%m-%d")
-
-        # Updated at - with realistic lag
-        if is_dirty and random.random() < 0.15:
-            updated_at = random.choice([None, "", "invalid"])
-        else:
-            if event_date and event_date not in [None, "", "invalid-date", "2024-13-45"]:
-                event_dt = datetime.strptime(event_date, "%Y-%m-%d")
-                lag_hours = LAG_BY_SOURCE.get(source if source in SOURCES else "aggregator", 24)
-                lag_variance = lag_hours * 0.5
-                actual_lag = max(0.1, random.gauss(lag_hours, lag_variance))
-                updated_dt = event_dt + timedelta(hours=actual_lag)
-                updated_at = updated_dt.strftime("%Y-%m-%d %H:%M:%S")
-            else:
-                updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Notes
-        notes = random.choice([
-            "Regular update",
-            "Court filing received",
-            "Trustee notification",
-            "Status change confirmed",
-            ""
-        ])
-
-        events.append({
-            "apn": apn,
-            "event_type": event_type,
-            "event_date": event_date,
-            "source": source,
-            "updated_at": updated_at,
-            "notes": notes
-        })
+    n = NUM_EVENTS
+    is_dirty = rng.random(n) < DIRTY_RATIO
+
+    # APN - sometimes invalid or orphaned
+    orphaned = is_dirty & (rng.random(n) < 0.2) & bool(valid_apns)
+    malformed = is_dirty & ~orphaned & (rng.random(n) < 0.1)
+    linked = pick(valid_apns, n) if valid_apns else generate_apns(n)
+    apns = np.select([orphaned, malformed], [generate_apns(n), generate_malformed_apns(n)], linked)
+
+    # Event type - sometimes invalid
+    bad_event_type = is_dirty & (rng.random(n) < 0.2)
+    event_types = np.where(bad_event_type, pick(DIRTY_EVENT_TYPES, n), pick(EVENT_TYPES, n))
+
+    # Source - sometimes invalid
+    bad_source = is_dirty & (rng.random(n) < 0.2)
+    sources = np.where(bad_source, pick(DIRTY_SOURCES, n), pick(SOURCES, n))
+
+    # Event date - sometimes missing or invalid
+    bad_event_date = is_dirty & (rng.random(n) < 0.15)
+    event_days = timestamps_ago(180, n).normalize()
+    event_dates = np.where(bad_event_date, pick(DIRTY_EVENT_DATES, n), event_days.strftime("%Y-%m-%d").to_numpy(dtype=object))
+
+    # Updated at - with realistic lag (unknown sources lag like the aggregator)
+    lag_hours = pd.Series(sources).map(LAG_BY_SOURCE).fillna(LAG_BY_SOURCE["aggregator"]).to_numpy()
+    actual_lag = np.maximum(0.1, rng.normal(lag_hours, lag_hours * 0.5))
+    lagged = (event_days + pd.to_timedelta(actual_lag, unit="h")).strftime("%Y-%m-%d %H:%M:%S").to_numpy(dtype=object)
+    fallback = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+    updated_at = np.where(bad_event_date, fallback, lagged)
+    bad_updated_at = is_dirty & (rng.random(n) < 0.15)
+    updated_at = np.where(bad_updated_at, pick(DIRTY_UPDATED_AT, n), updated_at)
+
+    events_df = pd.DataFrame({
+        "apn": apns,
+        "event_type": event_types,
+        "event_date": event_dates,
+        "source": sources,
+        "updated_at": updated_at,
+        "notes": pick(NOTES, n)
+    })
 
     # Inject duplicate events (same apn, event_type, event_date, source but different updated_at)
     num_dupes = int(NUM_EVENTS * 0.1)
-    for _ in range(num_dupes):
-        if events:
-            base_event = random.choice(events)
-            dupe = base_event.copy()
-            # Change updated_at to create duplicate
-            if dupe["updated_at"] and dupe["updated_at"] not in [None, "", "invalid"]:
-                try:
-                    updated_dt = datetime.strptime(dupe["updated_at"], "%Y-%m-%d %H:%M:%S")
-                    updated_dt += timedelta(hours=random.randint(1, 48))
-                    dupe["updated_at"] = updated_dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    pass
-            events.append(dupe)
-
-    return pd.DataFrame(events)
+    if num_dupes:
+        dupes_df = events_df.iloc[rng.integers(0, n, num_dupes)].reset_index(drop=True)
+        # Shift updated_at to create duplicate; invalid timestamps are copied as-is
+        dupe_updated = pd.to_datetime(dupes_df["updated_at"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+        shifted = dupe_updated + pd.to_timedelta(rng.integers(1, 49, num_dupes), unit="h")
+        dupes_df["updated_at"] = np.where(dupe_updated.notna(), shifted.dt.strftime("%Y-%m-%d %H:%M:%S"), dupes_df["updated_at"])
+        events_df = pd.concat([events_df, dupes_df], ignore_index=True)
+
+    return events_df
 
 
 def main():
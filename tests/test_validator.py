@@ -0,0 +1,158 @@
+"""Regression tests for validator.py (run from the repo root: python -m unittest discover -s tests)"""
+
+import tempfile
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import validator
+
+
+class TrimStringFieldsTest(unittest.TestCase):
+    def test_object_column_with_non_str_cells_is_trimmed(self):
+        df = pd.DataFrame({'apn': pd.Series([' 123-456-78 ', 12345678, None], dtype=object)})
+        trimmed = validator.trim_string_fields(df)
+        self.assertEqual(trimmed['apn'].tolist()[:2], ['123-456-78', 12345678])
+        self.assertTrue(pd.isna(trimmed['apn'].iloc[2]))
+
+    def test_skipped_columns_are_left_alone(self):
+        df = pd.DataFrame({'notes': [' a '], 'event_date': [' 2024-01-01 ']})
+        trimmed = validator.trim_string_fields(df, skip=('event_date',))
+        self.assertEqual(trimmed['notes'].iloc[0], 'a')
+        self.assertEqual(trimmed['event_date'].iloc[0], ' 2024-01-01 ')
+
+
+class ParseDatetimeSeriesTest(unittest.TestCase):
+    def test_unparseable_values_next_to_tz_aware_timestamps(self):
+        parsed = validator.parse_datetime_series(pd.Series(['2024-01-01T00:00:00Z', 'not-a-date', None]))
+        self.assertEqual(parsed.iloc[0], pd.Timestamp('2024-01-01', tz='UTC'))
+        self.assertTrue(parsed.iloc[1:].isna().all())
+
+    def test_ambiguous_dates_parse_per_value(self):
+        parsed = validator.parse_datetime_series(pd.Series(['13/01/2024', '05/01/2024']))
+        self.assertEqual(parsed.tolist(), [pd.Timestamp('2024-01-13'), pd.Timestamp('2024-05-01')])
+
+    def test_mixed_time_zones_parse_per_value(self):
+        parsed = validator.parse_datetime_series(pd.Series(['2024-01-01T00:00:00Z', '2024-01-02 10:00', '']))
+        self.assertEqual(parsed.iloc[0], pd.Timestamp('2024-01-01', tz='UTC'))
+        self.assertEqual(parsed.iloc[1], pd.Timestamp('2024-01-02 10:00'))
+        self.assertTrue(pd.isna(parsed.iloc[2]))
+
+    def test_mixed_formats_fall_back_per_value(self):
+        parsed = validator.parse_datetime_series(pd.Series(['2024-01-02', '01/05/2024 10:00']))
+        self.assertEqual(parsed.tolist(), [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-05 10:00')])
+
+
+def tz_events():
+    """Events frame with timezone-aware ISO timestamps"""
+    return pd.DataFrame({
+        'apn': ['123-456-78', '123-456-78'],
+        'event_type': ['Postponed', 'Sold'],
+        'event_date': ['2024-01-01T00:00:00Z', 'not-a-date'],
+        'source': ['aggregator', 'aggregator'],
+        'updated_at': ['2024-01-01T06:00:00Z', '2024-01-02T00:00:00Z'],
+        'notes': ['', ''],
+    })
+
+
+class TimezoneAwareInputTest(unittest.TestCase):
+    def test_events_with_tz_aware_timestamps(self):
+        stats = validator.ValidationStats()
+        valid, rejected = validator.validate_events(tz_events(), pd.Index(['123-456-78']), stats)
+        self.assertEqual(len(valid), 1)
+        self.assertEqual(rejected['_violation_reason'].tolist(), ['Invalid event_date'])
+
+    def test_lag_stats_on_tz_aware_events(self):
+        stats = validator.ValidationStats()
+        valid, _ = validator.validate_events(tz_events(), pd.Index(['123-456-78']), stats)
+        validator.calculate_lag_stats(valid, stats)
+        self.assertEqual(stats.lag_by_source, {'aggregator': 6.0})
+
+    def test_properties_with_tz_aware_timestamps(self):
+        properties = pd.DataFrame({
+            'apn': ['123-456-78', '123-456-78', '223-456-78'],
+            'county': ['Orange'] * 3,
+            'status': ['Active'] * 3,
+            'estimated_value': [100000, 200000, 300000],
+            'address': ['1 Main St'] * 3,
+            'last_updated': ['2024-01-01T00:00:00Z', '2024-02-01T00:00:00Z', 'not-a-date'],
+        })
+        stats = validator.ValidationStats()
+        valid, rejected = validator.validate_properties(properties, stats)
+        self.assertEqual(valid['estimated_value'].tolist(), [200000])
+        self.assertEqual(rejected['_violation_reason'].tolist(), ['Invalid last_updated date'])
+
+
+class ReadCsvRawTest(unittest.TestCase):
+    def test_short_rows_are_rejected_and_offsets_kept(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'properties.csv'
+            path.write_text(
+                'apn,county,status,estimated_value,address,last_updated\n'
+                '123-456-78,Orange,Active,200000,1 Main St,2024-01-01T00:00:00+01:00\n'
+                '223-456-78,Orange,Active\n'
+            )
+            valid, rejected = validator.validate_properties(
+                validator.read_csv_raw(path), validator.ValidationStats())
+        self.assertEqual(rejected['apn'].tolist(), ['223-456-78'])
+        self.assertIn('Invalid estimated_value', rejected['_violation_reason'].iloc[0])
+        self.assertIn('2024-01-01 00:00:00+01:00', valid.to_csv(index=False))
+
+
+def run_validation():
+    """Validate the bundled sample data and return the outputs as CSV text"""
+    stats = validator.ValidationStats()
+    properties, rejected_properties = validator.validate_properties(
+        validator.read_csv_raw('sample_data/properties.csv'), stats)
+    valid_apns = pd.Index(properties['apn'].unique())
+    events, rejected_events = validator.validate_events(
+        validator.read_csv_raw('sample_data/events.csv'), valid_apns, stats)
+    frames = [properties, rejected_properties, events, rejected_events]
+    return [frame.to_csv(index=False) for frame in frames], vars(stats)
+
+
+class ParallelValidationTest(unittest.TestCase):
+    def test_parallel_chunks_match_serial_run(self):
+        serial = run_validation()
+        with mock.patch.object(validator, 'PARALLEL_MIN_ROWS', 1), \
+                mock.patch.object(validator.os, 'cpu_count', return_value=3):
+            parallel = run_validation()
+        self.assertEqual(parallel, serial)
+
+    def test_ambiguous_dates_do_not_depend_on_chunking(self):
+        df = pd.DataFrame({
+            'apn': ['123-456-78', '223-456-78', '323-456-78', '423-456-78'],
+            'status': 'Active',
+            'estimated_value': 200000,
+            'last_updated': ['13/01/2024', '05/01/2024', '05/01/2024', '13/01/2024'],
+        })
+        serial = validator.validate_in_chunks(validator.validate_property_rows, df.copy())[0]
+        with mock.patch.object(validator, 'PARALLEL_MIN_ROWS', 1), \
+                mock.patch.object(validator.os, 'cpu_count', return_value=2):
+            parallel = validator.validate_in_chunks(validator.validate_property_rows, df.copy())[0]
+        self.assertEqual(parallel['last_updated'].tolist(), serial['last_updated'].tolist())
+        self.assertEqual(serial['last_updated'].iloc[1], pd.Timestamp('2024-05-01'))
+
+    def test_falls_back_to_serial_when_pool_cannot_start(self):
+        broken = mock.Mock(side_effect=BrokenProcessPool)
+        with mock.patch.object(validator, 'PARALLEL_MIN_ROWS', 1), \
+                mock.patch.object(validator.os, 'cpu_count', return_value=3), \
+                mock.patch.object(validator, 'ProcessPoolExecutor', broken):
+            parallel = run_validation()
+        self.assertTrue(broken.called)
+        self.assertEqual(parallel, run_validation())
+
+    def test_worker_kernel_matches_default_kernel(self):
+        apns = np.array(['123-456-78', '123-456-789', '12-3456-78', '', 'nan'], dtype=object)
+        expected = [True, False, False, False, False]
+        self.assertEqual(validator.apn_valid_kernel(apns).tolist(), expected)
+        with mock.patch.object(validator, 'IN_POOL_WORKER', True):
+            self.assertEqual(validator.apn_valid_kernel(apns).tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,9 +4,16 @@ Data Integrity Validator for real estate properties and events.
 Validates, cleanses, deduplicates, and reports on data quality.
 """
 
+import numpy as np
 import pandas as pd
+import multiprocessing
+import os
 import re
 import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
 from pathlib import Path
 
 
@@ -18,6 +25,25 @@ ALLOWED_SOURCE = {"attorney_update": "attorney_update", "trustee_site": "trustee
 # APN regex pattern
 APN_PATTERN = re.compile(r'^\d{3}-\d{3}-\d{2}$')
 
+# APN layout for the column-wise check: XXX-XXX-XX
+APN_LENGTH = 10
+APN_DIGIT_POSITIONS = [0, 1, 2, 4, 5, 6, 8, 9]
+
+# Frames at least this long are validated in parallel chunks
+PARALLEL_MIN_ROWS = 200_000
+
+# Set by init_validation_worker inside pool worker processes
+IN_POOL_WORKER = False
+
+# Output file buffer size; large buffers batch the writer's many small writes into few syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# JIT-compile the APN check when numba is installed
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 
 class ValidationStats:
     """Track validation statistics"""
@@ -40,11 +66,20 @@ def normalize_column_names(df):
     return df
 
 
-def trim_string_fields(df):
-    """Trim whitespace from all string fields"""
+def trim_string_fields(df, skip=()):
+    """Trim whitespace from all string fields, except columns in skip"""
     for col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].apply(lambda x: x.strip() if isinstance(x, str) else x)
+        if col in skip:
+            continue
+        if df[col].dtype == object:
+            # Object columns may mix str with other values; strip the str cells and keep the rest
+            try:
+                stripped = df[col].str.strip()
+            except AttributeError:
+                continue  # no str cells to trim
+            df[col] = stripped.where(stripped.notna(), df[col])
+        elif pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].str.strip()
     return df
 
 
@@ -56,6 +91,16 @@ def normalize_value(value, allowed_dict):
     return allowed_dict.get(value_lower)
 
 
+def normalize_series(series, allowed_dict):
+    """Normalize a whole column against allowed values (vectorized normalize_value)"""
+    # Low-cardinality column: normalize the handful of distinct categories, then remap codes
+    raw = series.astype('category')
+    canonical = raw.cat.categories.astype('string').str.strip().str.lower().map(allowed_dict)
+    category_codes, categories = pd.factorize(canonical)
+    codes = np.append(category_codes, -1)[raw.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=series.index)
+
+
 def validate_apn(apn):
     """Validate APN format: XXX-XXX-XX"""
     if pd.isna(apn) or apn == '':
@@ -63,6 +108,45 @@ def validate_apn(apn):
     return bool(APN_PATTERN.match(str(apn)))
 
 
+def apn_format_mask(chars):
+    """Check rows of APN code points: digits, dashes at 3 and 7, nothing past 10"""
+    digits = chars[:, APN_DIGIT_POSITIONS]
+    return (
+        ((digits >= 48) & (digits <= 57)).all(axis=1)
+        & (chars[:, 3] == 45) & (chars[:, 7] == 45) & (chars[:, APN_LENGTH] == 0)
+    )
+
+
+apn_format_mask_serial = apn_format_mask
+
+if njit is not None:
+    def apn_format_loop(chars):
+        """Loop form of apn_format_mask for numba; prange is a plain range unless compiled parallel"""
+        out = np.empty(chars.shape[0], np.bool_)
+        for i in prange(chars.shape[0]):
+            row = chars[i]
+            ok = row[3] == 45 and row[7] == 45 and row[10] == 0
+            for j in (0, 1, 2, 4, 5, 6, 8, 9):
+                ok = ok and 48 <= row[j] <= 57
+            out[i] = ok
+        return out
+
+    apn_format_mask = njit(parallel=True, cache=True)(apn_format_loop)
+    # Single-threaded for pool workers, so processes x threads don't oversubscribe. Not cached:
+    # numba keys the on-disk cache by function, so it would load the parallel build in its place
+    apn_format_mask_serial = njit(apn_format_loop)
+
+
+def apn_valid_kernel(values):
+    """Validate an array of APNs (vectorized validate_apn)"""
+    # One spare code point past the APN length exposes over-long values after truncation
+    fixed = np.asarray(values, dtype=f'U{APN_LENGTH + 1}')
+    chars = fixed.view(np.uint32).reshape(len(fixed), APN_LENGTH + 1)
+    if IN_POOL_WORKER:
+        return apn_format_mask_serial(chars)
+    return apn_format_mask(chars)
+
+
 def parse_datetime_safe(value):
     """Parse datetime, return NaT on error"""
     if pd.isna(value) or value == '':
@@ -73,13 +157,138 @@ def parse_datetime_safe(value):
         return pd.NaT
 
 
+def parse_datetime_series(series):
+    """Parse a whole column to datetime, NaT on error (vectorized parse_datetime_safe)"""
+    # format='mixed' parses every value on its own, like parse_datetime_safe, without a Python loop
+    try:
+        with warnings.catch_warnings():
+            # pandas 2 only warns on mixed time zones and returns a half-parsed column
+            warnings.simplefilter('error', FutureWarning)
+            return pd.to_datetime(series, errors='coerce', format='mixed')
+    except (ValueError, FutureWarning):
+        # Mixed time zones can't share one datetime dtype; parse per value into objects
+        return series.apply(parse_datetime_safe)
+
+
+def combine_violations(checks):
+    """Combine (mask, message) rule checks into violation reasons and a validity mask"""
+    masks = [np.asarray(mask, dtype=bool) for mask, _ in checks]
+    invalid = np.logical_or.reduce(masks)
+    # Only rejected rows get reasons; an object array holds them without fixed-width padding
+    reasons = np.full(len(invalid), '', dtype=object)
+    rejected = reasons[invalid]
+    for mask, (_, message) in zip(masks, checks):
+        hit = mask[invalid]
+        earlier = rejected[hit]
+        # Separate from earlier violations only, so no trailing '; ' needs stripping
+        rejected[hit] = np.where(earlier == '', message, earlier + '; ' + message)
+    reasons[invalid] = rejected
+    return reasons, ~invalid
+
+
+def read_csv_raw(path):
+    """Read a CSV with the C engine; validators do the typing"""
+    # Not pyarrow: it aborts on short rows and rewrites timestamp offsets to UTC
+    return pd.read_csv(path, engine='c')
+
+
+def write_csv(df, path):
+    """Write a DataFrame as CSV through a large write buffer"""
+    with open(path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE) as f:
+        df.to_csv(f, index=False)
+
+
+def init_validation_worker():
+    """Mark a pool worker so it runs single-threaded kernels; the pool already uses every CPU"""
+    global IN_POOL_WORKER
+    IN_POOL_WORKER = True
+
+
+def validate_in_chunks(row_validator, df, *args):
+    """Run a row-level validator, splitting large frames across worker processes"""
+    workers = os.cpu_count() or 1
+    if len(df) < PARALLEL_MIN_ROWS or workers < 2:
+        return row_validator(df, *args)
+
+    bounds = np.linspace(0, len(df), workers + 1, dtype=int)
+    chunks = [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    # Spawn fresh workers: forking after numba's threading layer has started can deadlock
+    spawn = multiprocessing.get_context('spawn')
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=spawn, initializer=init_validation_worker) as executor:
+            parts = list(executor.map(row_validator, chunks, *(repeat(arg) for arg in args)))
+    except (BrokenProcessPool, OSError):
+        # Workers re-import the caller's __main__; without an entry-point guard they die, so run serially
+        return row_validator(df, *args)
+    frames, reasons, valid = zip(*parts)
+    return pd.concat(frames), np.concatenate(reasons), np.concatenate(valid)
+
+
+def validate_property_rows(df):
+    """Apply per-row property rules; returns (typed df, violation reasons, valid mask)"""
+    # Validate APN format
+    apn_valid = apn_valid_kernel(df['apn'].to_numpy())
+
+    # Parse last_updated
+    df['last_updated'] = last_updated = parse_datetime_series(df['last_updated'])
+
+    # Normalize and validate status
+    df['status'] = status = normalize_series(df['status'], ALLOWED_STATUS)
+
+    # Validate estimated_value
+    df['estimated_value'] = ev = pd.to_numeric(df['estimated_value'], errors='coerce')
+    ev_nan = ev.isna().to_numpy()
+    ev_nonpos = ev.le(0).to_numpy() & ~ev_nan
+
+    # Track rejection reasons
+    reasons, valid = combine_violations([
+        (~apn_valid, 'Invalid APN format'),
+        (last_updated.isna().to_numpy(), 'Invalid last_updated date'),
+        (status.isna().to_numpy(), 'Invalid status value'),
+        (ev_nan, 'Invalid estimated_value (not numeric)'),
+        (ev_nonpos, 'Invalid estimated_value (must be > 0)'),
+    ])
+
+    return df, reasons, valid
+
+
+def validate_event_rows(df, valid_apns):
+    """Apply per-row event rules; returns (typed df, violation reasons, valid mask)"""
+    apn = df['apn'].to_numpy()
+
+    # Validate APN format
+    apn_valid = apn_valid_kernel(apn)
+
+    # FK check: apn must exist in properties
+    apn_exists = pd.Index(valid_apns).unique().get_indexer(apn) >= 0
+
+    # Parse event_date and updated_at
+    df['event_date'] = event_date = parse_datetime_series(df['event_date'])
+    df['updated_at'] = updated_at = parse_datetime_series(df['updated_at'])
+
+    # Normalize and validate event_type and source
+    df['event_type'] = event_type = normalize_series(df['event_type'], ALLOWED_EVENT_TYPE)
+    df['source'] = source = normalize_series(df['source'], ALLOWED_SOURCE)
+
+    # Track rejection reasons
+    reasons, valid = combine_violations([
+        (~apn_valid, 'Invalid APN format'),
+        (~apn_exists, 'APN not found in properties (FK violation)'),
+        (event_date.isna().to_numpy(), 'Invalid event_date'),
+        (updated_at.isna().to_numpy(), 'Invalid updated_at'),
+        (event_type.isna().to_numpy(), 'Invalid event_type'),
+        (source.isna().to_numpy(), 'Invalid source'),
+    ])
+
+    return df, reasons, valid
+
+
 def validate_properties(df, stats):
     """Validate properties dataset"""
     stats.properties_input = len(df)
 
-    # Normalize and trim first so required-column checks are case/whitespace tolerant
+    # Normalize first so required-column checks are case/whitespace tolerant
     df = normalize_column_names(df)
-    df = trim_string_fields(df)
 
     # Required columns
     required_cols = ['apn', 'county', 'status', 'estimated_value', 'address', 'last_updated']
@@ -87,56 +296,26 @@ def validate_properties(df, stats):
     if missing_cols:
         raise ValueError(f"Missing required columns in properties: {missing_cols}")
 
-    # Track rejection reasons
-    df['_violation_reason'] = ''
-    df['_valid'] = True
+    # Numeric and datetime columns are parsed whitespace-tolerantly, so only trim text
+    df = trim_string_fields(df, skip=('estimated_value', 'last_updated'))
 
-    # Validate APN format
-    df['_apn_valid'] = df['apn'].apply(validate_apn)
-    df.loc[~df['_apn_valid'], '_violation_reason'] += 'Invalid APN format; '
-    df.loc[~df['_apn_valid'], '_valid'] = False
-
-    # Parse last_updated
-    df['last_updated'] = df['last_updated'].apply(parse_datetime_safe)
-    df.loc[df['last_updated'].isna(), '_violation_reason'] += 'Invalid last_updated date; '
-    df.loc[df['last_updated'].isna(), '_valid'] = False
-
-    # Normalize and validate status
-    df['_status_normalized'] = df['status'].apply(lambda x: normalize_value(x, ALLOWED_STATUS))
-    df.loc[df['_status_normalized'].isna(), '_violation_reason'] += 'Invalid status value; '
-    df.loc[df['_status_normalized'].isna(), '_valid'] = False
-    df['status'] = df['_status_normalized']
-
-    # Validate estimated_value
-    df['estimated_value'] = pd.to_numeric(df['estimated_value'], errors='coerce')
-    df.loc[df['estimated_value'].isna(), '_violation_reason'] += 'Invalid estimated_value (not numeric); '
-    df.loc[df['estimated_value'].isna(), '_valid'] = False
-    df.loc[(df['estimated_value'].notna()) & (df['estimated_value'] <= 0), '_violation_reason'] += 'Invalid estimated_value (must be > 0); '
-    df.loc[(df['estimated_value'].notna()) & (df['estimated_value'] <= 0), '_valid'] = False
+    # Rule results stay in local arrays; only the split frames carry them
+    df, reasons, valid_mask = validate_in_chunks(validate_property_rows, df)
 
     # Split valid and rejected
-    rejected = df[~df['_valid']].copy()
-    valid = df[df['_valid']].copy()
-
-    # Clean up temporary columns from valid data
-    valid = valid.drop(columns=['_violation_reason', '_valid', '_apn_valid', '_status_normalized'])
+    valid = df.loc[valid_mask]
+    rejected = df.loc[~valid_mask].assign(_violation_reason=reasons[~valid_mask], _source_table='properties')
 
     # Deduplicate: keep newest last_updated per apn
     if len(valid) > 0:
         initial_count = len(valid)
-        valid = valid.sort_values('last_updated', ascending=False)
-        valid = valid.drop_duplicates(subset=['apn'], keep='first')
+        newest = valid.groupby('apn', sort=False)['last_updated'].idxmax()
+        valid = valid.loc[newest.sort_values()]
         stats.properties_duplicates_removed = initial_count - len(valid)
 
     stats.properties_cleaned = len(valid)
     stats.properties_rejected = len(rejected)
 
-    # Prepare rejected rows for output
-    if len(rejected) > 0:
-        rejected['_source_table'] = 'properties'
-        rejected['_violation_reason'] = rejected['_violation_reason'].str.rstrip('; ')
-        rejected = rejected.drop(columns=['_valid', '_apn_valid', '_status_normalized'])
-
     return valid, rejected
 
 
@@ -144,9 +323,8 @@ def validate_events(df, valid_apns, stats):
     """Validate events dataset"""
     stats.events_input = len(df)
 
-    # Normalize and trim first so required-column checks are case/whitespace tolerant
+    # Normalize first so required-column checks are case/whitespace tolerant
     df = normalize_column_names(df)
-    df = trim_string_fields(df)
 
     # Required columns
     required_cols = ['apn', 'event_type', 'event_date', 'source', 'updated_at', 'notes']
@@ -154,65 +332,26 @@ def validate_events(df, valid_apns, stats):
     if missing_cols:
         raise ValueError(f"Missing required columns in events: {missing_cols}")
 
-    # Track rejection reasons
-    df['_violation_reason'] = ''
-    df['_valid'] = True
+    # Numeric and datetime columns are parsed whitespace-tolerantly, so only trim text
+    df = trim_string_fields(df, skip=('event_date', 'updated_at'))
 
-    # Validate APN format
-    df['_apn_valid'] = df['apn'].apply(validate_apn)
-    df.loc[~df['_apn_valid'], '_violation_reason'] += 'Invalid APN format; '
-    df.loc[~df['_apn_valid'], '_valid'] = False
-
-    # FK check: apn must exist in properties
-    df['_apn_exists'] = df['apn'].isin(valid_apns)
-    df.loc[~df['_apn_exists'], '_violation_reason'] += 'APN not found in properties (FK violation); '
-    df.loc[~df['_apn_exists'], '_valid'] = False
-
-    # Parse event_date
-    df['event_date'] = df['event_date'].apply(parse_datetime_safe)
-    df.loc[df['event_date'].isna(), '_violation_reason'] += 'Invalid event_date; '
-    df.loc[df['event_date'].isna(), '_valid'] = False
-
-    # Parse updated_at
-    df['updated_at'] = df['updated_at'].apply(parse_datetime_safe)
-    df.loc[df['updated_at'].isna(), '_violation_reason'] += 'Invalid updated_at; '
-    df.loc[df['updated_at'].isna(), '_valid'] = False
-
-    # Normalize and validate event_type
-    df['_event_type_normalized'] = df['event_type'].apply(lambda x: normalize_value(x, ALLOWED_EVENT_TYPE))
-    df.loc[df['_event_type_normalized'].isna(), '_violation_reason'] += 'Invalid event_type; '
-    df.loc[df['_event_type_normalized'].isna(), '_valid'] = False
-    df['event_type'] = df['_event_type_normalized']
-
-    # Normalize and validate source
-    df['_source_normalized'] = df['source'].apply(lambda x: normalize_value(x, ALLOWED_SOURCE))
-    df.loc[df['_source_normalized'].isna(), '_violation_reason'] += 'Invalid source; '
-    df.loc[df['_source_normalized'].isna(), '_valid'] = False
-    df['source'] = df['_source_normalized']
+    # Rule results stay in local arrays; only the split frames carry them
+    df, reasons, valid_mask = validate_in_chunks(validate_event_rows, df, valid_apns)
 
     # Split valid and rejected
-    rejected = df[~df['_valid']].copy()
-    valid = df[df['_valid']].copy()
-
-    # Clean up temporary columns from valid data
-    valid = valid.drop(columns=['_violation_reason', '_valid', '_apn_valid', '_apn_exists', '_event_type_normalized', '_source_normalized'])
+    valid = df.loc[valid_mask]
+    rejected = df.loc[~valid_mask].assign(_violation_reason=reasons[~valid_mask], _source_table='events')
 
     # Deduplicate: keep newest updated_at per (apn, event_type, event_date, source)
     if len(valid) > 0:
         initial_count = len(valid)
-        valid = valid.sort_values('updated_at', ascending=False)
-        valid = valid.drop_duplicates(subset=['apn', 'event_type', 'event_date', 'source'], keep='first')
+        newest = valid.groupby(['apn', 'event_type', 'event_date', 'source'], sort=False, observed=True)['updated_at'].idxmax()
+        valid = valid.loc[newest.sort_values()]
         stats.events_duplicates_removed = initial_count - len(valid)
 
     stats.events_cleaned = len(valid)
     stats.events_rejected = len(rejected)
 
-    # Prepare rejected rows for output
-    if len(rejected) > 0:
-        rejected['_source_table'] = 'events'
-        rejected['_violation_reason'] = rejected['_violation_reason'].str.rstrip('; ')
-        rejected = rejected.drop(columns=['_valid', '_apn_valid', '_apn_exists', '_event_type_normalized', '_source_normalized'])
-
     return valid, rejected
 
 
@@ -221,12 +360,19 @@ def calculate_lag_stats(events_df, stats):
     if len(events_df) == 0:
         return
 
-    # Calculate lag for each event
-    events_df['_lag_hours'] = (events_df['updated_at'] - events_df['event_date']).dt.total_seconds() / 3600
+    # Calculate lag for each event: subtract as Series (tz-aware safe), then timedelta64 / 1 hour in numpy
+    elapsed = (events_df['updated_at'] - events_df['event_date']).to_numpy(dtype='timedelta64[ns]')
+    lag = elapsed / np.timedelta64(1, 'h')
+    events_df['_lag_hours'] = lag
 
-    # Average lag by source
-    lag_by_source = events_df.groupby('source')['_lag_hours'].mean().to_dict()
-    stats.lag_by_source = {k: round(v, 2) for k, v in lag_by_source.items()}
+    # Average lag by source: per-category sums and counts over the source codes
+    source = events_df['source'].astype('category')
+    categories = source.cat.categories
+    codes = source.cat.codes.to_numpy()
+    keep = (codes >= 0) & ~np.isnan(lag)
+    sums = np.bincount(codes[keep], weights=lag[keep], minlength=len(categories))
+    counts = np.bincount(codes[keep], minlength=len(categories))
+    stats.lag_by_source = {k: round(float(total / n), 2) for k, total, n in zip(categories, sums, counts) if n > 0}
 
 
 def calculate_postponements(events_df, stats):
@@ -234,8 +380,9 @@ def calculate_postponements(events_df, stats):
     if len(events_df) == 0:
         return
 
-    postponements = events_df[events_df['event_type'] == 'Postponed'].groupby('apn').size().to_dict()
-    stats.postponements_by_apn = postponements
+    postponed = (events_df['event_type'] == 'Postponed').to_numpy(dtype=bool)
+    apns, counts = np.unique(events_df['apn'].to_numpy()[postponed], return_counts=True)
+    stats.postponements_by_apn = dict(zip(apns.tolist(), counts.tolist()))
 
 
 def print_summary(stats):
@@ -309,15 +456,15 @@ def main():
 
     try:
         # Load data
-        properties_df = pd.read_csv(properties_file)
-        events_df = pd.read_csv(events_file)
+        properties_df = read_csv_raw(properties_file)
+        events_df = read_csv_raw(events_file)
 
         # Validate properties
         print("\nValidating properties...")
         clean_properties, rejected_properties = validate_properties(properties_df, stats)
 
         # Get valid APNs for FK check
-        valid_apns = set(clean_properties['apn'].tolist())
+        valid_apns = pd.Index(clean_properties['apn'].unique())
 
         # Validate events
         print("Validating events...")
@@ -331,8 +478,8 @@ def main():
         Path("outputs").mkdir(exist_ok=True)
 
         # Write cleaned data
-        clean_properties.to_csv("outputs/cleaned_properties.csv", index=False)
-        clean_events.to_csv("outputs/cleaned_events.csv", index=False)
+        write_csv(clean_properties, "outputs/cleaned_properties.csv")
+        write_csv(clean_events, "outputs/cleaned_events.csv")
 
         # Combine rejected rows
         all_rejected = []
@@ -349,10 +496,10 @@ def main():
             cols.remove('_source_table')
             rejected_df = rejected_df[['_source_table', '_violation_reason'] + cols]
             rejected_df = rejected_df.rename(columns={'_source_table': 'source_table', '_violation_reason': 'violation_reason'})
-            rejected_df.to_csv("outputs/rejected_rows.csv", index=False)
+            write_csv(rejected_df, "outputs/rejected_rows.csv")
         else:
             # Create empty rejected file
-            pd.DataFrame(columns=['source_table', 'violation_reason']).to_csv("outputs/rejected_rows.csv", index=False)
+            write_csv(pd.DataFrame(columns=['source_table', 'violation_reason']), "outputs/rejected_rows.csv")
 
         # Print summary
         print_summary(stats)